@@ -1,23 +1,119 @@
 import os
+import re
 import struct
 import numpy as np
 
-def read(path_to_image):
+# Pre-compiled Struct for packing/unpacking unsigned 32-bit header fields
+_U32 = struct.Struct("<I")
+
+# Pre-compiled pattern for the acquire_timestamp field. Used as a
+# fallback when the fixed-width timestamp cannot be sliced directly
+_TS_RE = re.compile(r"(\d{4})(\d{4})(\d{4})\.(\d{2}).(\d{9})")
+
+# Structured dtype describing the experimental metadata fields of the
+# 3072-byte MCCD header. Byte-offsets of the fields are based on this
+# `reference <http://www.sb.fsu.edu/~xray/Manuals/marCCD165header.html>`_
+_HEADER_DTYPE = np.dtype({
+    "names": ["nfast", "nslow", "xtal_to_detector", "beam_x", "beam_y",
+              "pixelsize_x", "pixelsize_y", "source_wavelength",
+              "acquire_timestamp"],
+    "offsets": [80, 84, 640, 644, 648, 772, 776, 908, 1344],
+    "formats": ["<u4", "<u4", "<u4", "<u4", "<u4", "<u4", "<u4", "<u4",
+                "S32"],
+    "itemsize": 3072,
+})
+# The header layout is structurally immutable; sanity-check it once at
+# import time instead of revalidating offsets on every parse
+assert _HEADER_DTYPE.itemsize == 3072
+assert _HEADER_DTYPE.fields["acquire_timestamp"][1] == 1344
+
+def read(path_to_image, copy=False):
     """
     Read MCCD image from file.
 
+    When given a path, the image is returned as a read-only np.memmap
+    backed by the file, so pixel data are paged in on demand rather
+    than copied into memory up front. File-like objects are read as a
+    zero-copy view over their buffer.
+
     Parameters
     ----------
-    path_to_image : str
-        Path to MCCD image to read
+    path_to_image : str or file-like
+        Path to MCCD image to read, or a binary file-like object
+        containing one
+    copy : bool
+        If True, materialize the image in memory instead of returning
+        a memory-mapped or buffer-backed view
 
     Returns
     -------
     (image, metadata, mccdheader) : tuple
-        Returns tuple containing the ndarray of the image, experimental 
+        Returns tuple containing the ndarray of the image, experimental
         metadata and the mccdheader
     """
-    
+
+    if hasattr(path_to_image, "read"):
+
+        # Read headers from file-like object
+        tiffheader = path_to_image.read(1024)
+        mccdheader = path_to_image.read(3072)
+
+        # Parse experimental metadata
+        metadata = _parseMCCDHeader(mccdheader)
+
+        # Image is a view over the object's remaining buffer
+        image = np.frombuffer(path_to_image.read(), dtype=np.uint16)
+        image = image.reshape(metadata["dimensions"])
+
+    else:
+
+        if not os.path.exists(path_to_image):
+            raise ValueError(f"{path_to_image} does not exist")
+
+        with open(path_to_image, 'rb') as mccd:
+
+            # Read headers
+            tiffheader = mccd.read(1024)
+            mccdheader = mccd.read(3072)
+
+            # Parse experimental metadata
+            metadata = _parseMCCDHeader(mccdheader)
+
+        # Memory-map image that follows the 1024-byte TIFF header and
+        # the 3072-byte MCCD header
+        image = np.memmap(path_to_image, dtype=np.uint16, mode='r',
+                          offset=4096, shape=metadata["dimensions"])
+
+    if copy:
+        image = np.array(image)
+
+    # Remove dimensions from metadata because it will be determined from
+    # the image shape
+    metadata.pop("dimensions")
+
+    return image, metadata, mccdheader
+
+def read_into(path_to_image, out):
+    """
+    Read MCCD image from file into a preallocated pixel array.
+
+    Skips the image allocation performed by read(), which is useful
+    when loading many frames into slices of one contiguous stack.
+
+    Parameters
+    ----------
+    path_to_image : str
+        Path to MCCD image to read
+    out : ndarray
+        C-contiguous np.uint16 array matching the image dimensions
+
+    Returns
+    -------
+    (metadata, mccdheader) : tuple
+        Returns tuple containing the experimental metadata and the
+        mccdheader
+    """
+
     if not os.path.exists(path_to_image):
         raise ValueError(f"{path_to_image} does not exist")
 
@@ -29,16 +125,21 @@ def read(path_to_image):
 
         # Parse experimental metadata
         metadata = _parseMCCDHeader(mccdheader)
-        
-        # Read image
-        image = np.frombuffer(mccd.read(), dtype=np.uint16)
-        image = image.reshape(metadata["dimensions"])
+
+        if out.dtype != np.uint16 or not out.flags.c_contiguous:
+            raise ValueError("out must be a C-contiguous np.uint16 array")
+        if tuple(out.shape) != metadata["dimensions"]:
+            raise ValueError(f"out has shape {tuple(out.shape)}; expected "
+                             f"{metadata['dimensions']}")
+
+        # Read image directly into the caller's buffer
+        mccd.readinto(memoryview(out).cast('B'))
 
     # Remove dimensions from metadata because it will be determined from
     # the image shape
     metadata.pop("dimensions")
-        
-    return image, metadata, mccdheader
+
+    return metadata, mccdheader
 
 def write(marccd, outfile):
     """
@@ -51,26 +152,51 @@ def write(marccd, outfile):
     outfile : str
         File to which MarCCD image will be written
     """
-    with open(outfile, "wb") as out:
+    with open(outfile, "wb", buffering=0) as out:
 
-        # Write TIFF header
-        out.write(_getTIFFHeader())
+        if marccd._mccdheader is None:
+            raise AttributeError("_mccdheader attribute was not found")
+
+        # MCCD images are always uint16 on disk; reinterpret 2-byte
+        # integer arrays in place and only convert (with a copy) as a
+        # last resort
+        image = marccd.image
+        if image.dtype != np.uint16:
+            if image.dtype.kind in "iu" and image.dtype.itemsize == 2:
+                image = image.view(np.uint16)
+            else:
+                image = image.astype(np.uint16)
+        if not image.flags.c_contiguous:
+            image = np.ascontiguousarray(image)
 
-        # Write MarCCD header
-        if marccd._mccdheader is not None:
-            out.write(_writeMCCDHeader(marccd))
+        # Gather both headers and the pixel buffer into a single writev
+        # syscall where available; fall back to sequential writes. Empty
+        # images contribute no pixel buffer, and a zero-size ndarray
+        # view cannot be cast anyway
+        buffers = [memoryview(_getTIFFHeader()),
+                   memoryview(_writeMCCDHeader(marccd))]
+        if image.size:
+            buffers.append(memoryview(image).cast('B'))
+        if hasattr(os, "writev"):
+            fd = out.fileno()
+            while buffers:
+                written = os.writev(fd, buffers)
+                while buffers and written >= buffers[0].nbytes:
+                    written -= buffers[0].nbytes
+                    buffers.pop(0)
+                if written:
+                    buffers[0] = buffers[0][written:]
         else:
-            raise AttributeError("_mccdheader attribute was not found")
+            for buffer in buffers:
+                out.write(buffer)
 
-        # Write image
-        out.write(marccd.image.flatten().reshape(1,-1))
-            
     return
 
 def _parseMCCDHeader(header):
     """
-    Parse experimental metadata from MCCD header. Byte-offsets of 
-    experimental parameters are based on this `reference 
+    Parse experimental metadata from MCCD header. The header is read in
+    a single pass using a structured dtype whose byte-offsets are based
+    on this `reference
     <http://www.sb.fsu.edu/~xray/Manuals/marCCD165header.html>`_
 
     Parameters
@@ -78,18 +204,40 @@ def _parseMCCDHeader(header):
     header : bytes
         MCCD header
     """
-    byte2int = struct.Struct("<I")
+    rec = np.frombuffer(header, dtype=_HEADER_DTYPE, count=1)[0]
     metadata = {}
-    metadata["dimensions"] = (byte2int.unpack(header[80:84])[0],
-                              byte2int.unpack(header[84:88])[0])
-    metadata["distance"] = float(byte2int.unpack(header[640:644])[0])/1e3
-    metadata["center"] = (float(byte2int.unpack(header[644:648])[0])/1e3,
-                          float(byte2int.unpack(header[648:652])[0])/1e3)
-    metadata["pixelsize"] = (float(byte2int.unpack(header[772:776])[0])/1e3,
-                             float(byte2int.unpack(header[776:780])[0])/1e3)
-    metadata["wavelength"] = float(byte2int.unpack(header[908:912])[0])/1e5
+    metadata["dimensions"] = (int(rec["nfast"]), int(rec["nslow"]))
+    metadata["distance"] = float(rec["xtal_to_detector"])/1e3
+    metadata["center"] = (float(rec["beam_x"])/1e3,
+                          float(rec["beam_y"])/1e3)
+    metadata["pixelsize"] = (float(rec["pixelsize_x"])/1e3,
+                             float(rec["pixelsize_y"])/1e3)
+    metadata["wavelength"] = float(rec["source_wavelength"])/1e5
+    metadata["timestamp"] = _parseTimestamp(rec["acquire_timestamp"])
     return metadata
 
+def _parseTimestamp(timestamp):
+    """
+    Parse acquire_timestamp field into a YYYY-MMDD-HHMM-SS-ns string.
+
+    The timestamp has the fixed-width format MMDDHHMMYYYY.SS followed by
+    nanoseconds, so it is sliced by offset directly; malformed values
+    fall back to a pre-compiled regex and yield None on mismatch.
+
+    Parameters
+    ----------
+    timestamp : bytes
+        Raw acquire_timestamp field from the MCCD header
+    """
+    ts = timestamp.decode("ascii", "ignore")
+    if len(ts) >= 25 and ts[:12].isdigit():
+        return f"{ts[8:12]}-{ts[0:4]}-{ts[4:8]}-{ts[13:15]}-{ts[16:25]}"
+    match = _TS_RE.match(ts)
+    if match:
+        mmdd, hhmm, year, sec, ns = match.groups()
+        return f"{year}-{mmdd}-{hhmm}-{sec}-{ns}"
+    return None
+
 def _writeMCCDHeader(marccd):
     """
     Write the MCCD header using the experimental metadata from the MarCCD
@@ -100,41 +248,54 @@ def _writeMCCDHeader(marccd):
     marccd : MarCCD
         MarCCD object from which to get experimental metadata
     """
-    # Set up header for indexing 
-    header = list(marccd._mccdheader)
-    int2byte = struct.Struct('<I')
+    # Set up mutable header buffer for in-place field packing
+    header = bytearray(marccd._mccdheader)
 
     # Write image dimensions
-    header[80:84] = int2byte.pack(marccd.dimensions[0])
-    header[84:88] = int2byte.pack(marccd.dimensions[1])
+    _U32.pack_into(header, 80, marccd.dimensions[0])
+    _U32.pack_into(header, 84, marccd.dimensions[1])
 
     # Write detector distance (two places)
     if marccd.distance is not None:
         dist = int(marccd.distance*1e3)
-        header[640:644] = int2byte.pack(dist)
-        header[696:700] = int2byte.pack(dist)
+        _U32.pack_into(header, 640, dist)
+        _U32.pack_into(header, 696, dist)
 
     # Write beam center
     if marccd.center is not None:
-        centerx = int(marccd.center[0]*1e3)
-        centery = int(marccd.center[1]*1e3)
-        header[644:648] = int2byte.pack(centerx)
-        header[648:652] = int2byte.pack(centery)    
-        
+        _U32.pack_into(header, 644, int(marccd.center[0]*1e3))
+        _U32.pack_into(header, 648, int(marccd.center[1]*1e3))
+
     # Write pixel size
     if marccd.pixelsize is not None:
-        pixelx = int(marccd.pixelsize[0]*1e3)
-        pixely = int(marccd.pixelsize[1]*1e3)
-        header[772:776] = int2byte.pack(pixelx)
-        header[776:780] = int2byte.pack(pixely)
+        _U32.pack_into(header, 772, int(marccd.pixelsize[0]*1e3))
+        _U32.pack_into(header, 776, int(marccd.pixelsize[1]*1e3))
 
     # Write X-ray wavelength
     if marccd.wavelength is not None:
         wavelength = int(np.round(marccd.wavelength*1e5))
-        header[908:912] = int2byte.pack(wavelength)
-    
+        _U32.pack_into(header, 908, wavelength)
+
     return bytes(header)
     
+# Default 1024-byte TIFF header for MCCD images, materialized once at
+# import time
+_TIFF_HEADER = (b'II*\x00\x08\x00\x00\x00\r\x00\x00\x01\x04\x00\x01'
+                b'\x00\x00\x00\x00\x0f\x00\x00\x01\x01\x04\x00\x01\x00'
+                b'\x00\x00\x00\x0f\x00\x00\x02\x01\x03\x00\x01\x00\x00'
+                b'\x00\x10\x00\x00\x00\x03\x01\x03\x00\x01\x00\x00\x00'
+                b'\x01\x00\x00\x00\x06\x01\x03\x00\x01\x00\x00\x00\x01'
+                b'\x00\x00\x00\x11\x01\x04\x00\x01\x00\x00\x00\x00\x10'
+                b'\x00\x00\x12\x01\x03\x00\x01\x00\x00\x00\x01\x00\x00'
+                b'\x00\x16\x01\x04\x00\x01\x00\x00\x00\x00\x0f\x00\x00'
+                b'\x17\x01\x04\x00\x01\x00\x00\x00\x00\x00\xc2\x01\x1a'
+                b'\x01\x05\x00\x01\x00\x00\x00\xaa\x00\x00\x00\x1b\x01'
+                b'\x05\x00\x01\x00\x00\x00\xb2\x00\x00\x00(\x01\x03\x00'
+                b'\x01\x00\x00\x00\x03\x00\x00\x00\x96\x87\x04\x00\x01'
+                b'\x00\x00\x00\x00\x04\x00\x00\x00\x00\x00\x00\x80\x96'
+                b'\x98\x00\x18Z\x01\x00\x80\x96\x98\x00\x18Z\x01')
+_TIFF_HEADER += b'\x00'*839
+
 def _getTIFFHeader():
     """
     Get the default 1024 byte TIFF header for MCCD images
@@ -144,19 +305,4 @@ def _getTIFFHeader():
     tiffheader : bytes
         1024 byte TIFF header
     """
-    tiffheader = (b'II*\x00\x08\x00\x00\x00\r\x00\x00\x01\x04\x00\x01'
-                  b'\x00\x00\x00\x00\x0f\x00\x00\x01\x01\x04\x00\x01\x00'
-                  b'\x00\x00\x00\x0f\x00\x00\x02\x01\x03\x00\x01\x00\x00'
-                  b'\x00\x10\x00\x00\x00\x03\x01\x03\x00\x01\x00\x00\x00'
-                  b'\x01\x00\x00\x00\x06\x01\x03\x00\x01\x00\x00\x00\x01'
-                  b'\x00\x00\x00\x11\x01\x04\x00\x01\x00\x00\x00\x00\x10'
-                  b'\x00\x00\x12\x01\x03\x00\x01\x00\x00\x00\x01\x00\x00'
-                  b'\x00\x16\x01\x04\x00\x01\x00\x00\x00\x00\x0f\x00\x00'
-                  b'\x17\x01\x04\x00\x01\x00\x00\x00\x00\x00\xc2\x01\x1a'
-                  b'\x01\x05\x00\x01\x00\x00\x00\xaa\x00\x00\x00\x1b\x01'
-                  b'\x05\x00\x01\x00\x00\x00\xb2\x00\x00\x00(\x01\x03\x00'
-                  b'\x01\x00\x00\x00\x03\x00\x00\x00\x96\x87\x04\x00\x01'
-                  b'\x00\x00\x00\x00\x04\x00\x00\x00\x00\x00\x00\x80\x96'
-                  b'\x98\x00\x18Z\x01\x00\x80\x96\x98\x00\x18Z\x01')
-    tiffheader += b'\x00'*839
-    return tiffheader
+    return _TIFF_HEADER
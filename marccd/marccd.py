@@ -1,9 +1,23 @@
 import os
-import struct
-import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from ._io import mccd
 
+# Empty 3072-byte MCCD header shared by all MarCCD objects that were not
+# initialized from a file. bytes are immutable, so aliasing is safe
+_EMPTY_MCCD_HEADER = bytes(3072)
+
+# Read-only empty image shared by all MarCCD objects constructed without
+# pixel data
+_EMPTY_IMAGE = np.empty((0, 0), dtype=np.uint16)
+_EMPTY_IMAGE.setflags(write=False)
+
+# Lightweight record of the fields analysis loops typically consume
+MarCCDRecord = namedtuple("MarCCDRecord",
+                          ["image", "distance", "center", "pixelsize",
+                           "wavelength"])
+
 class MarCCD:
     """
     Container for diffraction images that use MarCCD format.
@@ -38,10 +52,12 @@ class MarCCD:
 
     Parameters
     ----------
-    data : str or ndarray
+    data : str, os.PathLike, file-like, or ndarray
         MarCCD image to read or np.ndarray of image. If np.ndarray,
-        dtype should be np.uint16; if not, they will be coerced to 
-        np.uint16 and a warning will be generated.
+        dtype should be np.uint16; if not, they will be coerced to
+        np.uint16 and a warning will be generated. Other 2-byte
+        integer arrays are reinterpreted as a view that shares memory
+        with the input; all other dtypes are converted with a copy.
     name : str
         Name of image. If a filename is provided as data argument,
         name defaults to the filename.
@@ -51,6 +67,8 @@ class MarCCD:
         Beam center in pixels
     pixelsize : (float, float)
         Pixel size in microns
+    timestamp : str
+        Acquisition timestamp of image
     wavelength : float
         Wavelength of incident X-ray in angstroms
 
@@ -62,33 +80,53 @@ class MarCCD:
     in the MCCD header. 
     """
 
+    # MarCCD instances are plain data holders; __slots__ keeps them
+    # compact and avoids per-attribute property dispatch
+    __slots__ = ("image", "name", "distance", "center", "pixelsize",
+                 "timestamp", "wavelength", "_mccdheader", "_shm")
+
     def __init__(self, data=None, name=None, distance=None,
-                 center=None, pixelsize=None, wavelength=None):
+                 center=None, pixelsize=None, timestamp=None,
+                 wavelength=None):
         """
         Initialize MarCCD from file or np.ndarray. If no data argument 
         is given, an empty MarCCD object is returned.
         """        
         # Initialize all attributes in empty MarCCD object
-        self.image       = np.empty((0, 0))
+        self.image       = _EMPTY_IMAGE
         self.name        = None
         self.distance    = None
         self.center      = None
         self.pixelsize   = None
+        self.timestamp   = None
         self.wavelength  = None
-        self._mccdheader = b'\x00'*3072
-
-        # Initialize from np.ndarray
-        if isinstance(data, np.ndarray):
-            if data.dtype.type is not np.uint16:
-                warnings.warn(f"Data ndarray is of type {data.dtype.type}. "
-                              f"This will be coerced to type np.uint16.",
+        self._mccdheader = _EMPTY_MCCD_HEADER
+        self._shm        = None
+
+        # Initialize from array-like data exposing a dtype (ndarray,
+        # memmap, etc.)
+        dtype = getattr(data, "dtype", None)
+        if dtype is not None:
+            if dtype.type is np.uint16:
+                self.image = data
+            elif dtype.kind in "iu" and dtype.itemsize == 2:
+                # 2-byte integer data can be reinterpreted in place;
+                # same values modulo 2**16 as an astype, without the copy
+                import warnings
+                warnings.warn(f"Data ndarray is of type {dtype.type}. "
+                              f"This will be reinterpreted as np.uint16 "
+                              f"and share memory with the input array.",
                               UserWarning)
-                self.image = data.astype(np.uint16)
+                self.image = data.view(np.uint16)
             else:
-                self.image = data
+                import warnings
+                warnings.warn(f"Data ndarray is of type {dtype.type}. "
+                              f"This will be coerced to type np.uint16.",
+                              UserWarning)
+                self.image = data.astype(np.uint16, copy=False)
 
-        # Initialize from file path
-        elif isinstance(data, str):
+        # Initialize from file path or file-like object
+        elif isinstance(data, (str, os.PathLike)) or hasattr(data, "read"):
             self.read(data)
             
         elif data is not None:
@@ -97,53 +135,15 @@ class MarCCD:
                              f"np.ndarray.")
 
         # Set attributes if values are provided
-        if name is not None:
-            self.name = name
-        if distance is not None:
-            self.distance = distance
-        if center is not None:
-            self.center = center
-        if pixelsize is not None:
-            self.pixelsize = pixelsize
-        if wavelength is not None:
-            self.wavelength = wavelength
+        for attr, value in (("name", name), ("distance", distance),
+                            ("center", center), ("pixelsize", pixelsize),
+                            ("timestamp", timestamp),
+                            ("wavelength", wavelength)):
+            if value is not None:
+                setattr(self, attr, value)
 
         return
 
-    @property
-    def image(self):
-        """
-        MarCCD image as a numpy array
-
-        Returns
-        -------
-        image : ndarray
-            The MarCCD image as a numpy array
-        """
-        return self.__image
-
-    @image.setter
-    def image(self, value):
-        """Sets the MarCCD image to provided numpy array"""
-        self.__image = value
-
-    @property
-    def name(self):
-        """
-        Name of image
-
-        Returns
-        -------
-        name : str
-            The name of the image
-        """
-        return self.__name
-
-    @name.setter
-    def name(self, value):
-        """Sets the name of image to provided value"""
-        self.__name = value
-    
     @property
     def dimensions(self):
         """
@@ -154,100 +154,123 @@ class MarCCD:
         dimensions : (int, int)
             The dimensions of the MarCCD image in pixels
         """
-        return self.__image.shape
+        return self.image.shape
 
-    @property
-    def distance(self):
+    def to_shared(self):
         """
-        Crystal-to-detector distance in millimeters
-        
-        Returns
-        -------
-        distance : float
-            The crystal-to-detector distance in mm
-        """
-        return self.__distance
+        Move the image into a shared-memory segment for zero-copy IPC.
 
-    @distance.setter
-    def distance(self, value):
-        """Sets the crystal-to-detector distance to provided value"""
-        self.__distance = value
-
-    @property
-    def center(self):
-        """
-        Beam center in pixels
+        The image is copied once into a
+        multiprocessing.shared_memory.SharedMemory block and rebound to
+        a view of it, so passing this object between processes no
+        longer pickles the pixel data. The caller owns the segment and
+        is responsible for unlinking it when done.
 
         Returns
         -------
-        center : (float, float)
-            The beam center in pixels
+        name : str
+            Name of the shared-memory segment, for use with
+            MarCCD.from_shared() in a peer process
         """
-        return self.__center
-    
-    @center.setter
-    def center(self, value):
-        """Sets the beam center to provided value"""
-        self.__center = value
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(create=True,
+                                         size=self.image.nbytes)
+        image = np.ndarray(self.image.shape, dtype=self.image.dtype,
+                           buffer=shm.buf)
+        image[:] = self.image
+        self.image = image
+        self._shm = shm
+        return shm.name
 
-    @property
-    def pixelsize(self):
+    @classmethod
+    def from_shared(cls, name, shape, **kwargs):
         """
-        Pixel size in microns
+        Attach to an image in an existing shared-memory segment.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared-memory segment, as returned by
+            MarCCD.to_shared()
+        shape : (int, int)
+            Dimensions of the shared image in pixels
+        kwargs : dict
+            Optional attribute values forwarded to the constructor
 
         Returns
         -------
-        pixelsize : (float, float)
-            The pixel size in microns
+        image : MarCCD
+            MarCCD object whose image is a zero-copy view of the
+            shared segment
         """
-        return self.__pixelsize
-
-    @pixelsize.setter
-    def pixelsize(self, value):
-        """Sets the pixel size to provided value"""
-        self.__pixelsize = value
-
-    @property
-    def wavelength(self):
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        image = np.ndarray(shape, dtype=np.uint16, buffer=shm.buf)
+        marccd = cls(image, **kwargs)
+        marccd._shm = shm
+        return marccd
+
+    def as_record(self):
         """
-        Wavelength of incident X-ray in angstroms
+        Get a namedtuple of the image and experimental metadata.
+
+        Useful in analysis loops over many MarCCD objects, where a
+        single call gathers the commonly used fields instead of
+        repeated attribute accesses per frame.
 
         Returns
         -------
-        wavelength : float
-            The wavelength of incident X-ray source in angstroms
+        record : MarCCDRecord
+            Namedtuple of (image, distance, center, pixelsize,
+            wavelength)
         """
-        return self.__wavelength
+        return MarCCDRecord(self.image, self.distance, self.center,
+                            self.pixelsize, self.wavelength)
 
-    @wavelength.setter
-    def wavelength(self, value):
-        """Sets the wavelength to provided value"""
-        self.__wavelength = value
-        
     def __repr__(self):
         dims = self.dimensions
         return f"<marccd.MarCCD with {dims[0]}x{dims[1]} pixels at 0x{id(self)}>"
     
-    def read(self, path_to_image):
+    def read(self, path_to_image, copy=False):
         """
         Read MCCD image from file, populating fields in MarCCD
 
         Parameters
         ----------
-        path_to_image : str
-            Path to MCCD image to read
+        path_to_image : str, os.PathLike, or file-like
+            Path to MCCD image to read, or a binary file-like object
+            containing one
+        copy : bool
+            If True, materialize the image in memory instead of using
+            a memory-mapped view of the file
         """
+        # Determine image name; file-like objects may not carry one, and
+        # objects opened from a file descriptor carry an int instead
+        if hasattr(path_to_image, "read"):
+            name = getattr(path_to_image, "name", None)
+            if isinstance(name, (str, os.PathLike)):
+                name = os.fspath(name).rpartition(os.sep)[2]
+            else:
+                name = None
+        else:
+            path_to_image = os.fspath(path_to_image)
+            name = path_to_image.rpartition(os.sep)[2]
+
         # Read image
-        image, metadata, mccdheader = mccd.read(path_to_image)
+        image, metadata, mccdheader = mccd.read(path_to_image, copy=copy)
 
-        # Set standard attributes
-        self.name = os.path.basename(path_to_image)
-        self._mccdheader = mccdheader
+        # Set standard attributes. The header is kept as a bytearray so
+        # metadata fields can be patched in place before writing
+        self.name = name
+        self._mccdheader = bytearray(mccdheader)
         self.image = image
 
         # Set experimental metadata attributes
-        for key in metadata:
-            setattr(self, key, metadata[key])
+        self.distance   = metadata["distance"]
+        self.center     = metadata["center"]
+        self.pixelsize  = metadata["pixelsize"]
+        self.wavelength = metadata["wavelength"]
+        self.timestamp  = metadata["timestamp"]
 
         return
         
@@ -262,3 +285,66 @@ class MarCCD:
         """
         return mccd.write(self, outfile)
 
+    @classmethod
+    def read_many(cls, paths, workers=None):
+        """
+        Read multiple MCCD images using a pool of worker threads.
+
+        Reading an image is dominated by file I/O, which releases the
+        GIL, so reads of separate files can overlap.
+
+        Parameters
+        ----------
+        paths : iterable of str
+            Paths to MCCD images to read
+        workers : int
+            Number of worker threads to use. If None, defaults to the
+            ThreadPoolExecutor heuristic based on the CPU count
+
+        Returns
+        -------
+        images : list of MarCCD
+            MarCCD objects in the same order as paths
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(cls, paths))
+
+    @classmethod
+    def stack(cls, paths):
+        """
+        Read multiple MCCD images into a single contiguous 3D array.
+
+        All frames must share the dimensions of the first image. The
+        pixel data live in one (N, H, W) allocation; the returned
+        MarCCD objects are lightweight views into its slices.
+
+        Parameters
+        ----------
+        paths : list of str or os.PathLike
+            Paths to MCCD images to read
+
+        Returns
+        -------
+        (stack, images) : tuple
+            Returns tuple containing the (N, H, W) np.uint16 array of
+            pixel data and a list of MarCCD objects sharing it
+        """
+        paths = [os.fspath(path) for path in paths]
+        if not paths:
+            raise ValueError("paths must contain at least one image")
+
+        first = cls(paths[0])
+        stack = np.empty((len(paths),) + first.dimensions, dtype=np.uint16)
+        stack[0] = first.image
+        first.image = stack[0]
+        images = [first]
+
+        for i, path in enumerate(paths[1:], start=1):
+            metadata, mccdheader = mccd.read_into(path, stack[i])
+            image = cls(stack[i], **metadata)
+            image.name = path.rpartition(os.sep)[2]
+            image._mccdheader = bytearray(mccdheader)
+            images.append(image)
+
+        return stack, images
+
@@ -1,5 +1,6 @@
 import marccd
 from marccd._io import mccd
+import tempfile
 import unittest
 import numpy as np
 from os.path import join, abspath, dirname
@@ -33,20 +34,20 @@ class TestIOMCCD(unittest.TestCase):
         """Unit tests for mccd.write()"""
 
         mccdobj = marccd.MarCCD(self.testImage)
-        datadir = dirname(self.testImage)
-        temp = join(datadir, "temp.mccd")
-        
-        # _mccdheader attribute exists
-        mccd.write(mccdobj, temp)
-        self.assertTrue(os.path.exists(temp))
-        os.remove(temp)
-
-        # _mccdheader attribute does not exist
-        mccdobj._mccdheader = None
-        with self.assertRaises(AttributeError):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            temp = join(tmpdir, "temp.mccd")
+
+            # _mccdheader attribute exists
             mccd.write(mccdobj, temp)
-        os.remove(temp)
-            
+            self.assertTrue(os.path.exists(temp))
+            os.remove(temp)
+
+            # _mccdheader attribute does not exist
+            mccdobj._mccdheader = None
+            with self.assertRaises(AttributeError):
+                mccd.write(mccdobj, temp)
+            self.assertTrue(os.path.exists(temp))
+
         return
     
     def test_getTIFFHeader(self):